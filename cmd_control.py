@@ -4,33 +4,144 @@
 Does not provide multi-steps tests
 """
 
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import sys
 
-from zketech import Zketech, ZketechParametersError, ResponseDataSet
+from zketech import (Zketech, ZketechParametersError, ResponseDataSet,
+                     DeviceState, StateCode, ProgCode)
 
 
 WORKING_DIRECTORY = r"./local_files"
 LOGGING_FILENAME = r"zketech.log"
 LOGGING_LEVEL = logging.DEBUG
+LOGGING_FORMAT = '%(asctime)s:%(levelname)s:%(message)s'
+LOGGING_CAPACITY = 256  # number of records kept in memory before writing
+LOGGING_BUFFER_SIZE = 64 * 1024  # in bytes
+LOGGING_MAX_BYTES = 5_000_000  # size of a log file before rotating it
+LOGGING_BACKUP_COUNT = 3
 BLOCKING_SAFETY_WATCHER = True
+# Device states on which the continuous reads are ended
+READ_END_STATES = frozenset({DeviceState.disconnected,
+                             DeviceState.idle})
+TEST_READ_END_STATES = frozenset({DeviceState.disconnected,
+                                  DeviceState.idle,
+                                  DeviceState.monitoring})
+# Programs on which the safety watcher tracks the charging current
+CHARGE_PROG_CODES = frozenset({ProgCode.c_nimh,
+                               ProgCode.c_nicd,
+                               ProgCode.c_liion,
+                               ProgCode.c_life,
+                               ProgCode.c_vrla,
+                               ProgCode.c_cv})
+
+LOG_PATH = os.path.join(WORKING_DIRECTORY, LOGGING_FILENAME)
+
+os.makedirs(WORKING_DIRECTORY, exist_ok=True)
+
+
+class BufferedFileHandler(logging.handlers.RotatingFileHandler):
+    """Write log records to a rotating file through a large write buffer.
+    
+    Contrary to logging.handlers.RotatingFileHandler, the stream is not
+    flushed after each record, but only when its buffer is full, when a record
+    of at least 'flush_level' is emitted, or when 'flush' is called. The size
+    of the file is counted while writing instead of being read from the
+    stream for each record, which would flush it.
+    
+    """
+    
+    def __init__(self,
+                 filename: str,
+                 encoding: str|None = None,
+                 max_bytes: int = LOGGING_MAX_BYTES,
+                 backup_count: int = LOGGING_BACKUP_COUNT,
+                 buffer_size: int = LOGGING_BUFFER_SIZE,
+                 flush_level: int = logging.ERROR):
+        self.buffer_size = buffer_size
+        self.flush_level = flush_level
+        self.size = 0
+        super().__init__(filename,
+                         maxBytes=max_bytes,
+                         backupCount=backup_count,
+                         encoding=encoding)
+    
+    def _open(self):
+        stream = open(self.baseFilename,
+                      self.mode,
+                      buffering=self.buffer_size,
+                      encoding=self.encoding,
+                      errors=self.errors)
+        self.size = stream.tell()
+        return stream
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            msg = self.format(record) + self.terminator
+            if self.stream is None:
+                self.stream = self._open()
+            msg_size = len(msg.encode(self.encoding or "utf-8"))
+            if self.maxBytes > 0 and self.size + msg_size >= self.maxBytes:
+                self.doRollover()
+            self.stream.write(msg)
+            self.size += msg_size
+            if record.levelno >= self.flush_level:
+                self.stream.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+file_handler = BufferedFileHandler(LOG_PATH, encoding='utf-8')
+file_handler.setFormatter(logging.Formatter(LOGGING_FORMAT))
+memory_handler = logging.handlers.MemoryHandler(capacity=LOGGING_CAPACITY,
+                                                flushLevel=logging.ERROR,
+                                                target=file_handler)
+# Records are only queued by the logging threads, the file is written by the
+# listener thread
+log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(log_queue, memory_handler)
+log_listener.start()
+logging.getLogger().addHandler(logging.handlers.QueueHandler(log_queue))
+logging.getLogger().setLevel(LOGGING_LEVEL)
+logger = logging.getLogger(__name__)
 
-if not os.path.exists(WORKING_DIRECTORY):
-    os.mkdir(WORKING_DIRECTORY)
 
-logging.basicConfig(filename=os.path.join(WORKING_DIRECTORY, LOGGING_FILENAME), 
-                    encoding='utf-8', 
-                    level=LOGGING_LEVEL,
-                    format='%(asctime)s:%(levelname)s:%(message)s')
-logger = logging.getLogger(__name__)
+def flush_logs() -> None:
+    """Write the buffered log records to the log file."""
+    memory_handler.flush()
+    file_handler.flush()
+
+atexit.register(flush_logs)
+atexit.register(log_listener.stop)  # exit handlers are called in reverse order
 
 
 com_port = sys.argv[1]
 
 
+def prompt_number(message: str, kind: type = float) -> float|int|None:
+    """Ask the user for a number of the given kind (float or int).
+    
+    Return None if the typed value cannot be converted.
+    
+    """
+    print(message)
+    value = input("> ")
+    try:
+        return kind(value)
+    except ValueError:
+        print(f"The input parameter shall be {'an integer' if kind is int else 'a float'} value")
+        logger.info("User typed a wrong value")
+        return None
+
+_format_resp = "Voltage: {:6.3f} V, Current: {:6.3f} A, Capacity: {:4.0f} mAh".format
+
 def format_resp_for_print(resp: ResponseDataSet) -> str:
-    return f"Voltage: {resp.u:6.3f} V, Current: {resp.i:6.3f} A, Capacity: {resp.c:4.0f} mAh"
+    return _format_resp(resp.u, resp.i, resp.c)
 
 class SafetyWatcher:
     """Add additional safety controls to prevent issues with testing batteries
@@ -39,32 +150,59 @@ class SafetyWatcher:
     to the 'check' function
     """
 
-    min_voltage: float|None = None
-    min_current: float|None = None
-    last_voltage: float|None = None
-    last_current: float|None = None
+    __slots__ = ("prog_code", "min_voltage", "min_current", "last_voltage",
+                 "last_current")
+
+    prog_code: ProgCode|None
+    min_voltage: float|None
+    min_current: float|None
+    last_voltage: float|None
+    last_current: float|None
+
+    def __init__(self):
+        self.reset()
 
     def __enter__(self):
         return self
 
     def __exit__(self, *args, **kwargs):
-        pass
+        flush_logs()
     
+    def reset(self) -> None:
+        """Forget the metrics of the previous program."""
+        self.prog_code = None
+        self.min_voltage = None
+        self.min_current = None
+        self.last_voltage = None
+        self.last_current = None
+
     def update(self, resp: ResponseDataSet) -> bool:
-        """Update internal metrics from a response data set."""
-        if not resp.state_code.name == "testing":
-            self.min_voltage = None
-            self.min_current = None
-        if (not self.min_voltage) or (not self.min_current):
-            return
+        """Update internal metrics from a response data set.
+        
+        Metrics are only tracked while a charge program is running, and are
+        reset when the program changes. Return False when no minimum was
+        available to compare the metrics with: no charge running or first frame
+        of a charge.
+        
+        """
+        if (resp.state_code is not StateCode.testing
+                or resp.prog_code not in CHARGE_PROG_CODES):
+            self.reset()
+            return False
+        if resp.prog_code is not self.prog_code:
+            self.reset()
+            self.prog_code = resp.prog_code
         self.last_voltage = resp.u
         self.last_current = resp.i
-        if not (self.min_voltage and self.min_current):
-            self.min_voltage = self.last_voltage
-            self.min_current = self.last_current
+        if self.min_voltage is None:
+            self.min_voltage = resp.u
+            self.min_current = resp.i
             return False
-        self.min_voltage = min(self.min_voltage, self.last_voltage)
-        self.min_current = min(self.min_current, self.last_current)
+        if resp.u < self.min_voltage:
+            self.min_voltage = resp.u
+        if resp.i < self.min_current:
+            self.min_current = resp.i
+        return True
 
     def check(self) -> bool:
         """Call each safety watchers."""
@@ -79,480 +217,318 @@ class SafetyWatcher:
         user can indicate a thermal runaway.
         
         """
-        if not self.last_current:
-            return
-        if not self.min_current:
-            return
+        if self.last_current is None or self.min_current is None:
+            return False
         return self.last_current > (self.min_current + 0.05)
 
-class EvaluateDevice:
+def evaluate_device(device: Zketech, sw: SafetyWatcher) -> None:
     """Get device state from next sent frame."""
-    
-    prompt = "Determinate current device state"
-    
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        logger.info("Start program 'EvaluateDevice'")
-        device.get_device_state()
-        print(f"Device in state {zk.device_state.name}")
-        logger.info(f"End of 'EvaluateDevice' with result: {zk.device_state}")
+    logger.info("Start program 'EvaluateDevice'")
+    device.get_device_state()
+    print(f"Device in state {device.device_state.name}")
+    logger.info(f"End of 'EvaluateDevice' with result: {device.device_state}")
+evaluate_device.prompt = "Determinate current device state"
 
-class StartDevice:
+def start_device(device: Zketech, sw: SafetyWatcher) -> None:
     """Request the device to continuously send response frames."""
-    
-    prompt = "Start Zketech device on PC mode"
-    
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        logger.info("Start program 'StartDevice'")
-        device.start_device()
+    logger.info("Start program 'StartDevice'")
+    device.start_device()
+start_device.prompt = "Start Zketech device on PC mode"
 
-class StopDevice:
+def stop_device(device: Zketech, sw: SafetyWatcher) -> None:
     """Request the device to stop sending response frames."""
-    
-    prompt = "Stop Zketech device from PC mode"
-    
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        logger.info("Start program 'StopDevice'")
-        device.stop_device()
-
-class ContinuousRead:
+    logger.info("Start program 'StopDevice'")
+    device.stop_device()
+stop_device.prompt = "Stop Zketech device from PC mode"
+
+def _continuous_read(device: Zketech,
+                     sw: SafetyWatcher,
+                     end_states: frozenset[DeviceState],
+                     notify_test_end: bool = False) -> None:
+    """Read and print frames until the device is in one of 'end_states'."""
+    while True:
+        resp = device.read_response()
+        device_state = device.device_state
+        logger.debug("Response is: %s ; device state is: %s ; program is: %s ; device reference is: %s",
+                     resp, device_state, device.prog_state, device.part_number)
+        if device_state in end_states:
+            print(f"Device in state {device_state.name}; ending continuous read")
+            logger.info(f"Stop continuous read on device state: {device_state}")
+            return
+        if notify_test_end and device_state is DeviceState.ending:
+            print("The test reached its end")
+            logger.info(f"Received a end of test notice on device state: {device_state}")
+        if resp:
+            sw.update(resp)
+            if sw.check() == True:
+                if BLOCKING_SAFETY_WATCHER == True:
+                    print("Received a warning from the safety watcher, halting test")
+                    device.stop_test()
+                else:
+                    print("Received a warning from the safety watcher, continuing")
+            print(format_resp_for_print(resp), flush=True)
+
+def continuous_read(device: Zketech, sw: SafetyWatcher) -> None:
     """Continuously read data from the device"""
+    logger.info("Start program 'ContinuousRead'")
+    _continuous_read(device, sw, READ_END_STATES)
+    logger.info("Stop program 'ContinuousRead'")
+continuous_read.prompt = "Continuously read data from the device (ctrl+c to stop)"
 
-    prompt = "Continuously read data from the device (ctrl+c to stop)"
-
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        logger.info("Start program 'ContinuousRead'")
-        while True:
-            logger.debug("Request for reading")
-            resp = zk.read_response()
-            logger.debug(f"Response is: {resp}")
-            logger.debug(f"Device state is: {zk.device_state}")
-            logger.debug(f"Program is: {zk.prog_state}")
-            logger.debug(f"Device reference is: {zk.part_number}")
-            if zk.device_state.name in ("disconnected", "idle"):
-                print(f"Device in state {zk.device_state.name}; ending continuous read")
-                return
-            if resp:
-                sw.update(resp)
-                if sw.check() == True:
-                    if BLOCKING_SAFETY_WATCHER == True:
-                        print("Received a warning from the safety watcher, halting test")
-                        device.stop_test()
-                    else:
-                        print("Received a warning from the safety watcher, continuing")
-                print(format_resp_for_print(resp))
-        logger.info("Stop program 'ContinuousRead'")
-
-class ContinuousReadDuringTest:
+def continuous_read_during_test(device: Zketech, sw: SafetyWatcher) -> None:
     """Continuously read date from the device, stopping when the test end"""
+    logger.info("Start program 'ContinuousReadDuringTest'")
+    _continuous_read(device, sw, TEST_READ_END_STATES, notify_test_end=True)
+    logger.info("Stop program 'ContinuousReadDuringTest'")
+continuous_read_during_test.prompt = "Continuously read data from the device until the end of the test"
 
-    prompt = "Continuously read data from the device until the end of the test"
-
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        logger.info("Start program 'ContinuousReadDuringTest'")
-        while True:
-            resp = zk.read_response()
-            logger.debug(f"Response is: {resp}")
-            logger.debug(f"Device state is: {zk.device_state}")
-            logger.debug(f"Program is: {zk.prog_state}")
-            logger.debug(f"Device reference is: {zk.part_number}")
-            if zk.device_state.name in ("disconnected", "idle", "monitoring",):
-                print(f"Device in state {zk.device_state.name}; ending continuous read")
-                logger.info(f"Stop program 'ContinuousRead' on device state: {zk.device_state}")
-                return
-            if zk.device_state.name in ("ending",):
-                print("The test reached its end")
-                logger.info(f"Received a end of test notice on device state: {zk.device_state}")
-            if resp:
-                sw.update(resp)
-                if sw.check() == True:
-                    if BLOCKING_SAFETY_WATCHER == True:
-                        print("Received a warning from the safety watcher, halting test")
-                        device.stop_test()
-                    else:
-                        print("Received a warning from the safety watcher, continuing")
-                print(format_resp_for_print(resp))
-        logger.info("Stop program 'ContinuousReadDuringTest'")
-
-class StopTest:
+def stop_test(device: Zketech, sw: SafetyWatcher) -> None:
     """Stop current running test."""
-    
-    prompt = "Stop Zketech running test"
-    
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        logger.info("Start program 'StopTest'")
-        device.stop_test()
+    logger.info("Start program 'StopTest'")
+    device.stop_test()
+stop_test.prompt = "Stop Zketech running test"
 
-class ConstantCurrentDischarge:
+def constant_current_discharge(device: Zketech, sw: SafetyWatcher) -> None:
     """Do a discharge test at constant current."""
-    
-    prompt = "Do a discharge test at constant current"
-    
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        logger.info("Getting parameters for 'ConstantCurrentDischarge'")
-        print("Enter current setpoint (A):")
-        current = input("> ")
-        try:
-            self.current = float(current)
-        except:
-            print("The input parameter shall be a float value")
-            logger.info("User types a wrong value")
-            return False
-        print("Enter cutoff voltage setpoint (V):")
-        cutoff_voltage = input("> ")
-        try:
-            self.cutoff_voltage = float(cutoff_voltage)
-        except:
-            print("The input parameter shall be a float value")
-            logger.info("User types a wrong value")
-            return False
-        print("Enter timeout (min), '0' for no timeout:")
-        max_duration = input("> ")
-        try:
-            self.max_duration = int(max_duration)
-        except:
-            print("The input parameter shall be a integer value")
-            logger.info("User types a wrong value")
-            return False
-        logger.info(f"Start program 'ConstantCurrentDischarge' with parameters: {(self.current, self.cutoff_voltage, self.max_duration)}")
-        device.discharge_cc(self.current,
-                            self.cutoff_voltage,
-                            self.max_duration)
-        
-class ConstantPowerDischarge:
+    logger.info("Getting parameters for 'ConstantCurrentDischarge'")
+    current = prompt_number("Enter current setpoint (A):", float)
+    if current is None:
+        return
+    cutoff_voltage = prompt_number("Enter cutoff voltage setpoint (V):", float)
+    if cutoff_voltage is None:
+        return
+    max_duration = prompt_number("Enter timeout (min), '0' for no timeout:", int)
+    if max_duration is None:
+        return
+    logger.info(f"Start program 'ConstantCurrentDischarge' with parameters: {(current, cutoff_voltage, max_duration)}")
+    device.discharge_cc(current,
+                        cutoff_voltage,
+                        max_duration)
+constant_current_discharge.prompt = "Do a discharge test at constant current"
+
+def constant_power_discharge(device: Zketech, sw: SafetyWatcher) -> None:
     """Do a discharge test at constant power."""
-    
-    prompt = "Do a discharge test at constant power"
-    
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        logger.info("Getting parameters for 'ConstantPowerDischarge'")
-        print("Enter power setpoint (W):")
-        power = input("> ")
-        try:
-            self.power = float(power)
-        except:
-            print("The input parameter shall be a float value")
-            logger.info("User types a wrong value")
-            return False
-        print("Enter cutoff voltage setpoint (V):")
-        cutoff_voltage = input("> ")
-        try:
-            self.cutoff_voltage = float(cutoff_voltage)
-        except:
-            print("The input parameter shall be a float value")
-            logger.info("User types a wrong value")
-            return False
-        print("Enter timeout (min), '0' for no timeout:")
-        max_duration = input("> ")
-        try:
-            self.max_duration = int(max_duration)
-        except:
-            print("The input parameter shall be an int value")
-            logger.info("User types a wrong value")
-            return False
-        logger.info(f"Start program 'ConstantPowerDischarge' with parameters: {(self.current, self.cutoff_voltage, self.max_duration)}")
-        device.discharge_cc(self.power,
-                            self.cutoff_voltage,
-                            self.max_duration)
-
-class _GenericCurrentCharge:
-
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        print("Enter current setpoint (A):")
-        current = input("> ")
-        try:
-            self.current = float(current)
-        except:
-            print("The input parameter shall be a float value")
-            logger.info("User types a wrong value")
-            return False
-        print("Enter the number of cells:")
-        nb_cells = input("> ")
-        try:
-            self.nb_cells = int(nb_cells)
-        except:
-            print("The input parameter shall be a integer value")
-            logger.info("User types a wrong value")
-            return False
-        print("Enter max duration (min), '0' for no timeout:")
-        max_duration = input("> ")
-        try:
-            self.max_duration = int(max_duration)
-        except:
-            print("The input parameter shall be a integer value")
-            logger.info("User types a wrong value")
-            return False
-        return True
-
-class NimhCharge(_GenericCurrentCharge):
+    logger.info("Getting parameters for 'ConstantPowerDischarge'")
+    power = prompt_number("Enter power setpoint (W):", float)
+    if power is None:
+        return
+    cutoff_voltage = prompt_number("Enter cutoff voltage setpoint (V):", float)
+    if cutoff_voltage is None:
+        return
+    max_duration = prompt_number("Enter timeout (min), '0' for no timeout:", int)
+    if max_duration is None:
+        return
+    logger.info(f"Start program 'ConstantPowerDischarge' with parameters: {(power, cutoff_voltage, max_duration)}")
+    device.discharge_cp(power,
+                        cutoff_voltage,
+                        max_duration)
+constant_power_discharge.prompt = "Do a discharge test at constant power"
+
+def _get_current_charge_parameters() -> tuple[float, int, int]|None:
+    """Ask the user for the current, number of cells and max duration."""
+    current = prompt_number("Enter current setpoint (A):", float)
+    if current is None:
+        return None
+    nb_cells = prompt_number("Enter the number of cells:", int)
+    if nb_cells is None:
+        return None
+    max_duration = prompt_number("Enter max duration (min), '0' for no timeout:", int)
+    if max_duration is None:
+        return None
+    return current, nb_cells, max_duration
+
+def nimh_charge(device: Zketech, sw: SafetyWatcher) -> None:
     """Charge a NiMh battery or battery pack."""
-
-    prompt = "Charge a NiMh battery or battery pack"
-
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        logger.info("Getting parameters for 'NimhCharge'")
-        if not super().__init__(device, sw) == True:
-            return
-        logger.info(f"Start program 'NimhCharge' with parameters: {(self.current, self.nb_cells, self.max_duration)}")
-        device.charge_nimh(self.current,
-                           self.nb_cells,
-                           self.max_duration)
-
-class NicdCharge(_GenericCurrentCharge):
+    logger.info("Getting parameters for 'NimhCharge'")
+    parameters = _get_current_charge_parameters()
+    if parameters is None:
+        return
+    logger.info(f"Start program 'NimhCharge' with parameters: {parameters}")
+    device.charge_nimh(*parameters)
+nimh_charge.prompt = "Charge a NiMh battery or battery pack"
+
+def nicd_charge(device: Zketech, sw: SafetyWatcher) -> None:
     """Charge a NiCd battery or battery pack."""
-
-    prompt = "Charge a NiCd battery or battery pack"
-
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        logger.info("Getting parameters for 'NicdCharge'")
-        if not super().__init__(device, sw) == True:
-            return
-        logger.info(f"Start program 'NicdCharge' with parameters: {(self.current, self.nb_cells, self.max_duration)}")
-        device.charge_nicd(self.current,
-                           self.nb_cells,
-                           self.max_duration)
-
-class LiionCharge(_GenericCurrentCharge):
+    logger.info("Getting parameters for 'NicdCharge'")
+    parameters = _get_current_charge_parameters()
+    if parameters is None:
+        return
+    logger.info(f"Start program 'NicdCharge' with parameters: {parameters}")
+    device.charge_nicd(*parameters)
+nicd_charge.prompt = "Charge a NiCd battery or battery pack"
+
+def liion_charge(device: Zketech, sw: SafetyWatcher) -> None:
     """Charge a LiIon battery or battery pack."""
-
-    prompt = "Charge a LiIon battery or battery pack"
-
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        logger.info("Getting parameters for 'LiionCharge'")
-        if not super().__init__(device, sw) == True:
-            return
-        logger.info(f"Start program 'LiionCharge' with parameters: {(self.current, self.nb_cells, self.max_duration)}")
-        device.charge_liion(self.current,
-                            self.nb_cells,
-                            self.max_duration)
-
-class LifeCharge(_GenericCurrentCharge):
+    logger.info("Getting parameters for 'LiionCharge'")
+    parameters = _get_current_charge_parameters()
+    if parameters is None:
+        return
+    logger.info(f"Start program 'LiionCharge' with parameters: {parameters}")
+    device.charge_liion(*parameters)
+liion_charge.prompt = "Charge a LiIon battery or battery pack"
+
+def life_charge(device: Zketech, sw: SafetyWatcher) -> None:
     """Charge a LiFe battery or battery pack."""
-
-    prompt = "Charge a LiFe battery or battery pack"
-
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        logger.info("Getting parameters for 'LifeCharge'")
-        if not super().__init__(device, sw) == True:
-            return
-        logger.info(f"Start program 'LifeCharge' with parameters: {(self.current, self.nb_cells, self.max_duration)}")
-        device.charge_life(self.current,
-                           self.nb_cells,
-                           self.max_duration)
-
-class VrlaCharge(_GenericCurrentCharge):
+    logger.info("Getting parameters for 'LifeCharge'")
+    parameters = _get_current_charge_parameters()
+    if parameters is None:
+        return
+    logger.info(f"Start program 'LifeCharge' with parameters: {parameters}")
+    device.charge_life(*parameters)
+life_charge.prompt = "Charge a LiFe battery or battery pack"
+
+def vrla_charge(device: Zketech, sw: SafetyWatcher) -> None:
     """Charge a VRLA battery or battery pack."""
-
-    prompt = "Charge a VRLA battery or battery pack"
-
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        logger.info("Getting parameters for 'VrlaCharge'")
-        if not super().__init__(device, sw) == True:
-            return
-        logger.info(f"Start program 'VrlaCharge' with parameters: {(self.current, self.nb_cells, self.max_duration)}")
-        device.charge_vrla(self.current,
-                           self.nb_cells,
-                           self.max_duration)
-
-class _GenericVoltageCharge:
-
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        print("Enter voltage setpoint (V):")
-        voltage = input("> ")
-        try:
-            self.voltage = float(voltage)
-        except:
-            print("The input parameter shall be a float value")
-            logger.info("User types a wrong value")
-            return False
-        print("Enter the cutoff current (A):")
-        cutoff_current = input("> ")
-        try:
-            self.cutoff_current = float(cutoff_current)
-        except:
-            print("The input parameter shall be a float value")
-            logger.info("User types a wrong value")
-            return False
-        print("Enter max duration (min), '0' for no timeout:")
-        max_duration = input("> ")
-        try:
-            self.max_duration = int(max_duration)
-        except:
-            print("The input parameter shall be a integer value")
-            logger.info("User types a wrong value")
-            return False
-        return True
-
-class CvCharge(_GenericVoltageCharge):
+    logger.info("Getting parameters for 'VrlaCharge'")
+    parameters = _get_current_charge_parameters()
+    if parameters is None:
+        return
+    logger.info(f"Start program 'VrlaCharge' with parameters: {parameters}")
+    device.charge_vrla(*parameters)
+vrla_charge.prompt = "Charge a VRLA battery or battery pack"
+
+def _get_voltage_charge_parameters() -> tuple[float, float, int]|None:
+    """Ask the user for the voltage, cutoff current and max duration."""
+    voltage = prompt_number("Enter voltage setpoint (V):", float)
+    if voltage is None:
+        return None
+    cutoff_current = prompt_number("Enter the cutoff current (A):", float)
+    if cutoff_current is None:
+        return None
+    max_duration = prompt_number("Enter max duration (min), '0' for no timeout:", int)
+    if max_duration is None:
+        return None
+    return voltage, cutoff_current, max_duration
+
+def cv_charge(device: Zketech, sw: SafetyWatcher) -> None:
     """Charge a generic battery or battery pack at constant voltage."""
-
-    prompt = "Charge a generic battery or battery pack at constant voltage"
-
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        logger.info("Getting parameters for 'CvCharge'")
-        if not super().__init__(device, sw) == True:
-            return
-        logger.info(f"Start program 'CvCharge' with parameters: {(self.voltage, self.cutoff_current, self.max_duration)}")
-        device.charge_cv(self.voltage,
-                         self.cutoff_current,
-                         self.max_duration)
-
-class ResistanceMeasurement:
+    logger.info("Getting parameters for 'CvCharge'")
+    parameters = _get_voltage_charge_parameters()
+    if parameters is None:
+        return
+    logger.info(f"Start program 'CvCharge' with parameters: {parameters}")
+    device.charge_cv(*parameters)
+cv_charge.prompt = "Charge a generic battery or battery pack at constant voltage"
+
+def resistance_measurement(device: Zketech, sw: SafetyWatcher) -> None:
     """Measure the internal resistance of the battery."""
-    
-    prompt = "Measure the internal resistance of the battery"
-    
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        logger.info("Getting parameter for 'ResistanceMeasurement'")
-        print("Enter current setpoint (mA):")
-        current = input("> ")
-        try:
-            self.current = int(current)
-        except:
-            print("The input parameter shall be an integer value")
-            logger.info("User types a wrong value")
-            return
-        print()
-        logger.info(f"Start program 'ResistanceMeasurement' with a current setpoint of {self.current} mA")
-        resistance = device.measure_resistance(self.current)
-        if not resistance:
-            print("No resistance returned from the test")
-            logger.info("The program failed to receive a resistance value")
-        else:
-            print(f"Measured resistance: {resistance} mOhm")
-            logger.info(f"Measured resistance: {resistance} mOhm")
-
-class LowVoltageCalibration:
+    logger.info("Getting parameter for 'ResistanceMeasurement'")
+    current = prompt_number("Enter current setpoint (mA):", int)
+    if current is None:
+        return
+    print()
+    logger.info(f"Start program 'ResistanceMeasurement' with a current setpoint of {current} mA")
+    resistance = device.measure_resistance(current)
+    if not resistance:
+        print("No resistance returned from the test")
+        logger.info("The program failed to receive a resistance value")
+    else:
+        print(f"Measured resistance: {resistance} mOhm")
+        logger.info(f"Measured resistance: {resistance} mOhm")
+resistance_measurement.prompt = "Measure the internal resistance of the battery"
+
+def low_voltage_calibration(device: Zketech, sw: SafetyWatcher) -> None:
     """Calibrate the lower values of the voltage measurement."""
-    
-    prompt = "Calibrate the low voltage measurement"
-    
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        logger.info("Getting parameter for 'LowVoltageCalibration'")
-        print("Enter low voltage calibration value (V):")
-        voltage = input("> ")
-        try:
-            self.voltage = float(voltage)
-        except:
-            print("The input parameter shall be a float value")
-            logger.info("User typed a wrong value")
-            return
-        print()
-        logger.info(f"Setting low voltage calibration to {voltage} V")
-        device.calibrate_voltage(self.voltage, "lower")
-
-class HighVoltageCalibration:
+    logger.info("Getting parameter for 'LowVoltageCalibration'")
+    voltage = prompt_number("Enter low voltage calibration value (V):", float)
+    if voltage is None:
+        return
+    print()
+    logger.info(f"Setting low voltage calibration to {voltage} V")
+    device.calibrate_voltage(voltage, "lower")
+low_voltage_calibration.prompt = "Calibrate the low voltage measurement"
+
+def high_voltage_calibration(device: Zketech, sw: SafetyWatcher) -> None:
     """Calibrate the upper values of the voltage measurement."""
-    
-    prompt = "Calibrate the high voltage measurement"
-    
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        logger.info("Getting parameter for 'HighVoltageCalibration'")
-        print("Enter high voltage calibration value (V):")
-        voltage = input("> ")
-        try:
-            self.voltage = float(voltage)
-        except:
-            print("The input parameter shall be a float value")
-            logger.info("User typed a wrong value")
-            return
-        print()
-        logger.info(f"Setting high voltage calibration to {voltage} V")
-        device.calibrate_voltage(self.voltage, "upper")
-
-class LowCurrentCalibration:
+    logger.info("Getting parameter for 'HighVoltageCalibration'")
+    voltage = prompt_number("Enter high voltage calibration value (V):", float)
+    if voltage is None:
+        return
+    print()
+    logger.info(f"Setting high voltage calibration to {voltage} V")
+    device.calibrate_voltage(voltage, "upper")
+high_voltage_calibration.prompt = "Calibrate the high voltage measurement"
+
+def low_current_calibration(device: Zketech, sw: SafetyWatcher) -> None:
     """Calibrate the lower value of the current measurement."""
-    
-    prompt = "Calibrate the low current measurement"
-    
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        logger.info("Getting parameter for 'LowCurrentCalibration'")
-        print("The device shall first be supplied a proper tension and be in constant current discharge to calibrate the current")
-        print("Enter low current calibration value (A):")
-        current = input("> ")
-        try:
-            self.current = float(current)
-        except:
-            print("The input parameter shall be a float value")
-            logger.info("User typed a wrong value")
-            return
-        print()
-        logger.info(f"Setting low current calibration to {voltage} V")
-        device.calibrate_current(self.current, "lower")
-
-class HighCurrentCalibration:
+    logger.info("Getting parameter for 'LowCurrentCalibration'")
+    print("The device shall first be supplied a proper tension and be in constant current discharge to calibrate the current")
+    current = prompt_number("Enter low current calibration value (A):", float)
+    if current is None:
+        return
+    print()
+    logger.info(f"Setting low current calibration to {current} A")
+    device.calibrate_current(current, "lower")
+low_current_calibration.prompt = "Calibrate the low current measurement"
+
+def high_current_calibration(device: Zketech, sw: SafetyWatcher) -> None:
     """Calibrate the upper value of the current measurement."""
-    
-    prompt = "Calibrate the high current measurement"
-    
-    def __init__(self, device: Zketech, sw: SafetyWatcher):
-        logger.info("Getting parameter for 'HighCurrentCalibration'")
-        print("The device shall first be supplied a proper tension and be in constant current discharge to calibrate the current")
-        print("Enter high current calibration value (A):")
-        current = input("> ")
-        try:
-            self.current = float(current)
-        except:
-            print("The input parameter shall be a float value")
-            logger.info("User typed a wrong value")
-            return
-        print()
-        logger.info(f"Setting low current calibration to {voltage} V")
-        device.calibrate_current(self.current, "upper")
+    logger.info("Getting parameter for 'HighCurrentCalibration'")
+    print("The device shall first be supplied a proper tension and be in constant current discharge to calibrate the current")
+    current = prompt_number("Enter high current calibration value (A):", float)
+    if current is None:
+        return
+    print()
+    logger.info(f"Setting high current calibration to {current} A")
+    device.calibrate_current(current, "upper")
+high_current_calibration.prompt = "Calibrate the high current measurement"
 
 
 choices_available = [
-    EvaluateDevice,
-    StopDevice,
-    StartDevice,
-    ContinuousRead,
-    ContinuousReadDuringTest,
-    StopTest,
-    ConstantCurrentDischarge,
-    ConstantPowerDischarge,
-    NimhCharge,
-    NicdCharge,
-    LiionCharge,
-    LifeCharge,
-    VrlaCharge,
-    CvCharge,
-    ResistanceMeasurement,
-    LowVoltageCalibration,
-    HighVoltageCalibration,
-    LowCurrentCalibration,
-    HighCurrentCalibration,
+    evaluate_device,
+    stop_device,
+    start_device,
+    continuous_read,
+    continuous_read_during_test,
+    stop_test,
+    constant_current_discharge,
+    constant_power_discharge,
+    nimh_charge,
+    nicd_charge,
+    liion_charge,
+    life_charge,
+    vrla_charge,
+    cv_charge,
+    resistance_measurement,
+    low_voltage_calibration,
+    high_voltage_calibration,
+    low_current_calibration,
+    high_current_calibration,
     ]
 
+MENU_TEXT = "Type function number:\n" + "\n".join(f"{i}: {c.prompt}" for i, c in enumerate(choices_available))
+
 if __name__ == "__main__":
     
+    # Console output is written in blocks: on each 'input' prompt or explicitly
+    # once per received frame
+    sys.stdout.reconfigure(line_buffering=False)
+    
     try:
-        with Zketech(com_port) as zk:
-            pass
-    except:
+        zk = Zketech(com_port)
+    except Exception:
         print(f"Could not open serial port at address '{com_port}'")
         sys.exit()
     
-    with Zketech(com_port) as zk, SafetyWatcher() as sw:
+    zk.enable_low_latency()
+    
+    with zk, SafetyWatcher() as sw:
         
         try:
             while True:
                 
                 print()
                 
-                print("Type function number:")
-                for i, c in enumerate(choices_available):
-                    print(f"{i}: {c.prompt}")
-                func_id = input("> ")
-                try:
-                    chosen_function = choices_available[int(func_id)]
-                except TypeError:
-                    print("Function number shall be an integer")
-                    continue
-                except ValueError:
+                print(MENU_TEXT)
+                func_id = input("> ").strip()
+                if not func_id.isdecimal():
                     print("Function number shall be an integer")
                     continue
-                except IndexError:
+                func_nb = int(func_id)
+                if not func_nb < len(choices_available):
                     print("Function number shall be in the available list")
                     continue
+                chosen_function = choices_available[func_nb]
                 try:
                     print()
                     chosen_function(zk, sw)
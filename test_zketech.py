@@ -0,0 +1,105 @@
+"""Check the frames reader of the Zketech class against a pseudo terminal.
+
+The pseudo terminal stands for the device: frames written on its master side
+are received by the Zketech instance opened on its slave side.
+"""
+
+import os
+import time
+
+import pytest
+
+pytest.importorskip("serial")
+if not hasattr(os, "openpty"):
+    pytest.skip("pseudo terminals are not available", allow_module_level=True)
+
+import zketech
+from zketech import (Zketech, DeviceState, StateCode, BEGIN_MARKER,
+                     END_MARKER, zketech_checksum)
+
+
+WAIT_TIMEOUT = 5  # in seconds, before giving up on the frames reader
+
+
+def response_frame(state_code: StateCode, current_ma: int = 0) -> bytes:
+    """Build a valid response frame for a constant current discharge."""
+    values = [state_code.value * 10, *divmod(current_ma, 240)] + [0] * 12 + [5]
+    return bytes([BEGIN_MARKER, *values, zketech_checksum(bytes(values)), END_MARKER])
+
+def wait_for_frame(device: Zketech, frame: bytes) -> None:
+    """Wait until the frames reader stored 'frame' as the last frame."""
+    with device._frames_available:
+        assert device._frames_available.wait_for(
+            lambda: device._last_frame and device._last_frame[1] == frame,
+            WAIT_TIMEOUT)
+
+def wait_for_bytes_read(device: Zketech) -> None:
+    """Wait until the frames reader took the bytes written on the terminal."""
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while device.in_waiting:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def device(monkeypatch):
+    monkeypatch.setattr(zketech, "ZKETECH_READING_TIMEOUT", 0.5)
+    master, slave = os.openpty()
+    zk = Zketech(os.ttyname(slave))
+    zk.master = master
+    yield zk
+    zk.close()
+    os.close(master)
+    os.close(slave)
+
+
+def test_read_response_serves_the_last_frame(device):
+    for current_ma in range(1000, 1010):
+        os.write(device.master, response_frame(StateCode.testing, current_ma))
+    wait_for_frame(device, response_frame(StateCode.testing, 1009))
+    assert device.read_response().i == 1.009
+    assert device.device_state is DeviceState.testing
+
+def test_frames_received_before_a_request_are_not_served(device):
+    for current_ma in range(10):
+        os.write(device.master, response_frame(StateCode.ended, current_ma))
+    wait_for_frame(device, response_frame(StateCode.ended, 9))
+    device.discharge_cc(1.0, 3.0, 10)
+    assert device.read_response() is None
+    assert device.device_state is DeviceState.idle
+    os.write(device.master, response_frame(StateCode.testing))
+    assert device.read_response().state_code is StateCode.testing
+    assert device.device_state is DeviceState.testing
+
+def test_reader_resynchronises_on_invalid_bytes(device):
+    corrupted = bytearray(response_frame(StateCode.testing, 1000))
+    corrupted[3] ^= 1
+    os.write(device.master, b"\x01\x02" + corrupted + response_frame(StateCode.ending, 500)[:7])
+    wait_for_bytes_read(device)
+    os.write(device.master, response_frame(StateCode.ending, 500)[7:])
+    assert device.read_response().i == 0.5
+    assert device.device_state is DeviceState.ending
+
+def test_reader_restarts_when_the_port_is_reopened(device):
+    # A pseudo terminal cannot be configured again once closed, so the port
+    # is reopened on a new one
+    for current_ma in (1000, 500):
+        device.close()
+        master, slave = os.openpty()
+        device.port = os.ttyname(slave)
+        with device:
+            os.write(master, response_frame(StateCode.testing, current_ma))
+            assert device.read_response().i == current_ma / 1000
+            assert device.device_state is DeviceState.testing
+        os.close(master)
+        os.close(slave)
+
+def test_device_is_disconnected_when_the_reader_fails(device):
+    device.close()
+    master, slave = os.openpty()
+    device.port = os.ttyname(slave)
+    with device:
+        os.close(master)
+        assert device.read_response() is None
+        assert device.device_state is DeviceState.disconnected
+    os.close(slave)
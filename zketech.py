@@ -5,10 +5,12 @@ functions provided in the original Zketech GUI
 """
 
 import logging
+import sys
+import threading
 from functools import reduce
 from operator import xor
 import struct
-from serial import Serial
+from serial import Serial, SerialException
 from enum import Enum
 from dataclasses import dataclass
 
@@ -49,6 +51,11 @@ class ProgState(Enum):
 BEGIN_MARKER =          250
 END_MARKER =            248
 
+# Precompiled layouts of the frames (see RequestFrame and ResponseFrame)
+_REQ_PAYLOAD_STRUCT = struct.Struct("<7B")
+_REQ_STRUCT = struct.Struct("<B7sBB")
+_RES_STRUCT = struct.Struct("<19B")
+
 class ReqCode(Enum):
     """Describe the request code of the request frame.
     
@@ -169,52 +176,83 @@ class PartNumber(Enum):
     ebd_a5s =           18
     ebd_a20h =          19
 
-    
+
+# Codes values accepted in the frames
+_REQ_CODE_VALUES = frozenset(c.value for c in ReqCode)
+_STATE_CODE_VALUES = frozenset(c.value for c in StateCode)
+_PROG_CODE_VALUES = frozenset(c.value for c in ProgCode)
+_PART_NUMBER_VALUES = frozenset(c.value for c in PartNumber)
+
+# Request code of the constant current charges, by battery type
+_CURRENT_CHARGE_CODES = {
+    "nimh":             ReqCode.start_c_nimh,
+    "nicd":             ReqCode.start_c_nicd,
+    "liion":            ReqCode.start_c_liion,
+    "life":             ReqCode.start_c_life,
+    "vrla":             ReqCode.start_c_vrla,
+    }
+
+# Device state for the response StateCodes, other ones meaning monitoring
+_STATE_TO_DEVICE_STATE = {
+    StateCode.testing:  DeviceState.testing,
+    StateCode.ending:   DeviceState.ending,
+    }
+
+
 # Main usage functions
 
 
 def zketech_checksum(buff: bytes) -> int:
-    """Compute the chekcum used by zketech equipments."""
+    """Compute the chekcum used by zketech equipments.
+    
+    reduce with operator.xor iterates over the buffer in C; it is faster than
+    folding the buffer loaded as an integer for frame sized buffers.
+    
+    """
     return reduce(xor, buff) % 240
 
 
 def check_buffer_validity(buff:bytes) -> bool:
-    """Check if the response buffer is compliant with the frame definition."""
-    if not len(buff) in (10, 19):
-        logger.warning(f"Buffer's length ({len(buff)}) does not correspond to a request or a response")
+    """Check if the response buffer is compliant with the frame definition.
+    
+    The buffer is inspected through a memoryview, so the payload is not
+    copied to compute its checksum.
+    
+    """
+    view = memoryview(buff)
+    length = len(view)
+    if not length in (10, 19):
+        logger.warning(f"Buffer's length ({length}) does not correspond to a request or a response")
         return False
-    if not buff[0] == BEGIN_MARKER:
-        logger.warning(f"Buffer's first byte ({buff[0]}) does not correspond to a begin marker ({BEGIN_MARKER})")
+    first_byte = view[0]
+    if not first_byte == BEGIN_MARKER:
+        logger.warning(f"Buffer's first byte ({first_byte}) does not correspond to a begin marker ({BEGIN_MARKER})")
         return False
-    if not buff[-1] == END_MARKER:
-        logger.warning(f"Buffer's last byte ({buff[-1]}) does not correspond to a end marker ({END_MARKER})")
+    last_byte = view[length-1]
+    if not last_byte == END_MARKER:
+        logger.warning(f"Buffer's last byte ({last_byte}) does not correspond to a end marker ({END_MARKER})")
         return False
-    if not buff[-2] == zketech_checksum(buff[1:-2]):
-        logger.warning(f"Buffer's computed checksum ({reduce(xor, buff[1:-2])}) does not correspond to checksum field value ({buff[-2]})")
+    checksum_field = view[length-2]
+    checksum = zketech_checksum(view[1:length-2])
+    if not checksum_field == checksum:
+        logger.warning(f"Buffer's computed checksum ({checksum}) does not correspond to checksum field value ({checksum_field})")
         return False
-    if len(buff) == 10:
-        try:
-            ReqCode(buff[1])
-        except:
-            logger.warning(f"Unknown request ReqCode ({buff[1]})")
+    code_val = view[1]
+    if length == 10:
+        if not code_val in _REQ_CODE_VALUES:
+            logger.warning(f"Unknown request ReqCode ({code_val})")
             return False
-    if len(buff) == 19:
-        state_code_val = buff[1] // 10
-        try:
-            StateCode(state_code_val)
-        except:
+    if length == 19:
+        state_code_val = code_val // 10
+        if not state_code_val in _STATE_CODE_VALUES:
             logger.warning(f"Unknown response StateCode ({state_code_val})")
             return False
-        prog_code_val = buff[1] % 10
-        try:
-            ProgCode(prog_code_val)
-        except:
+        prog_code_val = code_val % 10
+        if not prog_code_val in _PROG_CODE_VALUES:
             logger.warning(f"Unknown response ProgCode ({prog_code_val})")
             return False
-        part_number_val = buff[-3]
-        try:
-            PartNumber(part_number_val)
-        except:
+        part_number_val = view[length-3]
+        if not part_number_val in _PART_NUMBER_VALUES:
             logger.warning(f"Unknown zketech part number ({part_number_val})")
             return False
     return True
@@ -232,8 +270,29 @@ class RequestDataSet:
     
     p1 to p3 are raw values, with scaling different for each request code.
     
+    Slots are declared explicitly, as the custom __init__ stores more
+    attributes than the dataclass fields.
+    
     """
     
+    __slots__ = (
+        "begin_marker",
+        "req_code",
+        "req_code_val",
+        "p1",
+        "p1_h",
+        "p1_l",
+        "p2",
+        "p2_h",
+        "p2_l",
+        "p3",
+        "p3_h",
+        "p3_l",
+        "payload",
+        "checksum",
+        "end_marker",
+        )
+    
     req_code: ReqCode
     p1: int
     p2: int
@@ -246,39 +305,35 @@ class RequestDataSet:
                  p3: int=0):
         """Init a request data set.
         
-        Check the parameters, split them in parts, compute checksum.
+        Check the parameters, split them in parts, pack them in the payload
+        bytes and compute checksum.
         
         """
-        if any([p1<0, p2<0, p3<0]):
+        if p1 < 0 or p2 < 0 or p3 < 0:
             raise ValueError("p1 to P3 parameters shall not be negative")
-        if any([p1>57600, p2>57600, p3>57600]):
+        if p1 > 57600 or p2 > 57600 or p3 > 57600:
             raise ValueError("p1 to P3 parameters shall ne inferior to 57600")
         self.begin_marker = BEGIN_MARKER
         self.req_code = req_code
         self.req_code_val = req_code.value
         self.p1 = p1
-        self.p1_h = p1 // 240
-        self.p1_l = p1 % 240
+        self.p1_h, self.p1_l = divmod(p1, 240)
         self.p2 = p2
-        self.p2_h = p2 // 240
-        self.p2_l = p2 % 240
+        self.p2_h, self.p2_l = divmod(p2, 240)
         self.p3 = p3
-        self.p3_h = p3 // 240
-        self.p3_l = p3 % 240
-        values_to_checksum = (
-            self.req_code_val,
-            self.p1_h,
-            self.p1_l,
-            self.p2_h,
-            self.p2_l,
-            self.p3_h,
-            self.p3_l,
-            )
-        self.checksum = zketech_checksum(values_to_checksum)
+        self.p3_h, self.p3_l = divmod(p3, 240)
+        self.payload = _REQ_PAYLOAD_STRUCT.pack(self.req_code_val,
+                                                self.p1_h,
+                                                self.p1_l,
+                                                self.p2_h,
+                                                self.p2_l,
+                                                self.p3_h,
+                                                self.p3_l)
+        self.checksum = zketech_checksum(self.payload)
         self.end_marker = END_MARKER
 
 
-@dataclass
+@dataclass(slots=True)
 class ResponseDataSet:
     """ Store the parameters and metrics received in a response frame.
     
@@ -288,8 +343,8 @@ class ResponseDataSet:
     
     state_code: StateCode
     prog_code: ProgCode
-    i: int
-    u: int
+    i: float
+    u: float
     c: int
     unknown: int
     p1: int
@@ -298,42 +353,28 @@ class ResponseDataSet:
     part_number: PartNumber
     checksum: int
     
-    def __init__(self,
-                 begin_marker: int,
-                 res_code_val: int,
-                 i_h: int,
-                 i_l: int,
-                 u_h: int,
-                 u_l: int,
-                 c_h: int,
-                 c_l: int,
-                 unknown_h: int,
-                 unknown_l: int,
-                 p1_h: int,
-                 p1_l: int,
-                 p2_h: int,
-                 p2_l: int,
-                 p3_h: int,
-                 p3_l: int,
-                 part_number_val: int,
-                 checksum: int,
-                 end_marker: int):
-        """Init a response data set.
+    @classmethod
+    def from_raw(cls, values: tuple[int, ...]) -> "ResponseDataSet":
+        """Build a response data set from the 19 bytes of a response frame.
         
         Join and scale metrics parts, join parameters parts.
         
         """
-        self.state_code = StateCode(res_code_val//10)
-        self.prog_code = ProgCode(res_code_val%10)
-        self.i = (i_h * 240 + i_l) / 1000
-        self.u = (u_h * 240 + u_l) / 1000
-        self.c = c_h * 240 + c_l
-        self.unknown = unknown_h * 240 + unknown_l
-        self.p1 = p1_h * 240 + p1_l
-        self.p2 = p2_h * 240 + p2_l
-        self.p3 = p3_h * 240 + p3_l
-        self.part_number = PartNumber(part_number_val)
-        self.checksum = checksum
+        (_, res_code_val,
+         i_h, i_l, u_h, u_l, c_h, c_l, unknown_h, unknown_l,
+         p1_h, p1_l, p2_h, p2_l, p3_h, p3_l,
+         part_number_val, checksum, _) = values
+        return cls(StateCode(res_code_val//10),
+                   ProgCode(res_code_val%10),
+                   (i_h * 240 + i_l) / 1000,
+                   (u_h * 240 + u_l) / 1000,
+                   c_h * 240 + c_l,
+                   unknown_h * 240 + unknown_l,
+                   p1_h * 240 + p1_l,
+                   p2_h * 240 + p2_l,
+                   p3_h * 240 + p3_l,
+                   PartNumber(part_number_val),
+                   checksum)
 
 
 class RequestFrame:
@@ -353,30 +394,23 @@ class RequestFrame:
     labels = (
         "begin_marker",
         "req_code",
-        "p1_h"
+        "p1_h",
         "p1_l",
-        "p2_h"
+        "p2_h",
         "p2_l",
-        "p3_h"
+        "p3_h",
         "p3_l",
         "checksum",
         "end_marker",
         )
     
-    def get_buffer(self, data: RequestDataSet) -> bytes:
+    @staticmethod
+    def get_buffer(data: RequestDataSet) -> bytes:
         """Compute the bytes from the IDs and parameters."""
-        values = (
-            data.begin_marker,
-            data.req_code.value,
-            data.p1_h,
-            data.p1_l,
-            data.p2_h,
-            data.p2_l,
-            data.p3_h,
-            data.p3_l,
-            data.checksum,
-            data.end_marker)
-        buff = struct.pack("<"+"B"*10, *values)
+        buff = _REQ_STRUCT.pack(data.begin_marker,
+                                data.payload,
+                                data.checksum,
+                                data.end_marker)
         if not check_buffer_validity(buff):
             return b''
         return buff
@@ -420,13 +454,21 @@ class ResponseFrame:
         "end_marker",
         )
 
-    def get_response_data_set(self, buff: bytes) -> ResponseDataSet:
+    @staticmethod
+    def get_response_data_set(buff: bytes) -> ResponseDataSet:
         """Compute IDs, parameters parts and metrics parts from bytes."""
         if not check_buffer_validity(buff):
             return None
-        values = struct.unpack("<"+"B"*19, buff)
-        kwargs = {k:v for k,v in zip(self.labels, values)}
-        return ResponseDataSet(**kwargs)
+        return ResponseDataSet.from_raw(_RES_STRUCT.unpack(buff))
+
+
+# Buffers of the requests without parameters, sent as is
+_CONSTANT_REQUEST_BUFFERS = {
+    req_code: RequestFrame.get_buffer(RequestDataSet(req_code))
+    for req_code in (ReqCode.start_device,
+                     ReqCode.stop_device,
+                     ReqCode.stop_test)
+    }
 
     
 class Zketech(Serial):
@@ -438,6 +480,11 @@ class Zketech(Serial):
     Low level:
         - Send request and read response
         
+    Incoming bytes are continuously read by a background thread while the
+    serial port is open, and only the last valid response frame is kept until
+    read, so a response never reports a state older than the last frame sent
+    by the device. Sending a request discards it, as it predates the request.
+        
     High level:
         - Get device state
         - Start and stop device
@@ -461,21 +508,109 @@ class Zketech(Serial):
     
     """
     
-    device_state: DeviceState = DeviceState["disconnected"]
+    device_state: DeviceState = DeviceState.disconnected
     prog_state: ProgState|None = None
     part_number: PartNumber|None = None
     
     def __init__(self, com_port: str) -> None:
-        """Init device by opening serial port."""
+        """Init device by opening serial port and starting the frames reader."""
+        # Set before opening the port, as opening it starts the frames reader
+        self._last_frame = None
+        self._frames_available = threading.Condition()
+        self._reader_stop = threading.Event()
+        self._reader = None
+        self._reader_error = None
         super().__init__(port=com_port,
                          baudrate=9600,
                          bytesize=8,
                          parity='E',
                          stopbits=1,
                          timeout=ZKETECH_READING_TIMEOUT)
-        if self.isOpen():
-            self.device_state = DeviceState["idle"]
-            self.flush()
+    
+    def open(self) -> None:
+        """Open the serial port and start the frames reader."""
+        super().open()
+        self.device_state = DeviceState.idle
+        self.flush()
+        self._reader_stop.clear()
+        self._reader_error = None
+        self._reader = threading.Thread(target=self._read_frames,
+                                        name=f"zketech reader ({self.port})",
+                                        daemon=True)
+        self._reader.start()
+    
+    def close(self) -> None:
+        """Stop the frames reader and close the serial port."""
+        if self._reader is not None:
+            self._reader_stop.set()
+            self.cancel_read()
+            self._reader.join()
+            self._reader = None
+        super().close()
+    
+    def reset_input_buffer(self) -> None:
+        """Discard the received bytes and the frame not read yet."""
+        super().reset_input_buffer()
+        self._discard_frame()
+    
+    def _discard_frame(self) -> None:
+        """Discard the last received frame not read yet."""
+        with self._frames_available:
+            self._last_frame = None
+    
+    def _read_frames(self) -> None:
+        """Read incoming bytes and store the last valid response frame.
+        
+        Run in the background thread until the port is closed or a reading
+        error occurs, in which case the error is kept for read_response. Bytes
+        are accumulated until a begin marker followed by a full valid frame is
+        found; on an invalid frame, the search resumes after its begin marker.
+        
+        """
+        buff = bytearray()
+        while not self._reader_stop.is_set():
+            try:
+                buff += self.read(self.in_waiting or 1)
+            except (SerialException, OSError) as e:
+                logger.error(f"Stopped reading frames from the device ({e})")
+                with self._frames_available:
+                    self._reader_error = e
+                    self._frames_available.notify()
+                return
+            while True:
+                start = buff.find(BEGIN_MARKER)
+                if start < 0:
+                    buff.clear()
+                    break
+                if len(buff) - start < 19:
+                    del buff[:start]
+                    break
+                frame = bytes(buff[start:start+19])
+                if frame[-1] == END_MARKER and check_buffer_validity(frame):
+                    data = ResponseDataSet.from_raw(_RES_STRUCT.unpack(frame))
+                    with self._frames_available:
+                        self._last_frame = (data, frame)
+                        self._frames_available.notify()
+                    del buff[:start+19]
+                else:
+                    del buff[:start+1]
+    
+    def enable_low_latency(self) -> bool:
+        """Ask the serial driver to deliver received bytes without delay.
+        
+        Set the ASYNC_LOW_LATENCY flag of the port (as 'setserial low_latency'),
+        which is only available on Linux. Return False if the platform or the
+        driver does not support it.
+        
+        """
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            self.set_low_latency_mode(True)
+        except (OSError, ValueError) as e:
+            logger.info(f"Could not set the serial port in low latency mode ({e})")
+            return False
+        return True
     
     def send_request(self,
                      req_code: ReqCode,
@@ -488,52 +623,66 @@ class Zketech(Serial):
         
         """
         if not self.isOpen():
-            self.device_state = DeviceState["disconnected"]
+            self.device_state = DeviceState.disconnected
             return
-        frame = RequestFrame()
         data = RequestDataSet(req_code, p1, p2, p3)
-        buff = frame.get_buffer(data)
+        buff = RequestFrame.get_buffer(data)
         if buff:
+            self._discard_frame()
             self.write(buff)
-            logger.debug(f"Sended request to device ({data})")
-            logger.debug(f"Sended buffer: 0x{buff.hex()}")
+            logger.debug("Sended request to device (%s)", data)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Sended buffer: 0x%s", buff.hex())
+    
+    def _send_constant_request(self, req_code: ReqCode) -> None:
+        """Send a request without parameters from its precomputed buffer."""
+        if not self.isOpen():
+            self.device_state = DeviceState.disconnected
+            return
+        buff = _CONSTANT_REQUEST_BUFFERS[req_code]
+        self._discard_frame()
+        self.write(buff)
+        logger.debug("Sended request to device (%s)", req_code)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sended buffer: 0x%s", buff.hex())
     
     def read_response(self) -> None|ResponseDataSet:
         """Read response from device.
         
-        Check buffer, parse data.
+        Wait for the last frame stored by the frames reader, up to the reading
+        timeout, and update the device state from it. The device is considered
+        disconnected once the frames reader stopped on a reading error.
         
         """
         self.part_number = None
         self.battery_type = None
 #        if not self.isOpen():
-#            self.device_state = DeviceState["disconnected"]
+#            self.device_state = DeviceState.disconnected
 #            logger.debug("Tried to read response from a disconnected device")
 #            return
-        # TBDone : Improvements: either have a constant async read on background or automatically
-        # stop the PC connection so the device does not fill continuously the buffer
-        if self.in_waiting > 19:
-            self.reset_input_buffer()
-        # end of the to be improved section
-        buff = self.read(size=19)
-        if len(buff) == 0:
-            self.device_state = DeviceState["idle"]
-            logger.debug("Tried to read response from an idled device")
+        with self._frames_available:
+            if self._frames_available.wait_for(
+                    lambda: self._last_frame or self._reader_error,
+                    ZKETECH_READING_TIMEOUT) and self._last_frame:
+                data, buff = self._last_frame
+                self._last_frame = None
+            else:
+                data = None
+        if data is None and self._reader_error is not None:
+            self.device_state = DeviceState.disconnected
+            logger.debug("Tried to read response from a disconnected device")
             return
-        if not check_buffer_validity(buff):
-            logger.debug("Buffer invalid")
+        if data is None:
+            self.device_state = DeviceState.idle
+            logger.debug("Tried to read response from an idled device")
             return
-        self.device_state = DeviceState["monitoring"]
-        frame = ResponseFrame()
-        data = frame.get_response_data_set(buff)
         self.part_number = data.part_number
-        if data.state_code.name == "testing":
-            self.device_state = DeviceState["testing"]
-        if data.state_code.name == "ending":
-            self.device_state = DeviceState["ending"]
+        self.device_state = _STATE_TO_DEVICE_STATE.get(data.state_code,
+                                                       DeviceState.monitoring)
         self.prog_state = ProgState(data.prog_code.value)
-        logger.debug(f"Received response from device ({data})")
-        logger.debug(f"Received buffer: 0x{buff.hex()}")
+        logger.debug("Received response from device (%s)", data)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received buffer: 0x%s", buff.hex())
         return data
     
     def get_device_state(self) -> None:
@@ -542,39 +691,30 @@ class Zketech(Serial):
     
     def start_device(self) -> None:
 #        """Request the device to start sending frames."""
-#        if not self.device_state == DeviceState["idle"]:
+#        if not self.device_state == DeviceState.idle:
 #            logger.warning(f"A startup of the device was requested while device in wrong state ({self.device_state})")
 #            return
-        req_code = ReqCode["start_device"]
-        p1 = 0
-        p2 = 0
-        p3 = 0
-        logger.debug(f"Sending request {(req_code, p1, p2, p3)}")
-        self.send_request(req_code, p1, p2, p3)
+        req_code = ReqCode.start_device
+        logger.debug("Sending request %s", (req_code, 0, 0, 0))
+        self._send_constant_request(req_code)
     
     def stop_device(self) -> None:
         """Request the device to stop sending frames."""
-#        if not self.device_state == DeviceState["monitoring"]:
+#        if not self.device_state == DeviceState.monitoring:
 #            logger.warning(f"A stopping of the device was requested while device in wrong state ({self.device_state})")
 #            return
-        req_code = ReqCode["stop_device"]
-        p1 = 0
-        p2 = 0
-        p3 = 0
-        logger.debug(f"Sending request {(req_code, p1, p2, p3)}")
-        self.send_request(req_code, p1, p2, p3)
+        req_code = ReqCode.stop_device
+        logger.debug("Sending request %s", (req_code, 0, 0, 0))
+        self._send_constant_request(req_code)
 
     def stop_test(self):
         """Request the device to stop sending frames."""
-#        if not self.device_state == DeviceState["testing"]:
+#        if not self.device_state == DeviceState.testing:
 #            logger.warning(f"A stopping of a test was requested while device in wrong state ({self.device_state})")
 #            return
-        req_code = ReqCode["stop_test"]
-        p1 = 0
-        p2 = 0
-        p3 = 0
-        logger.debug(f"Sending request {(req_code, p1, p2, p3)}")
-        self.send_request(req_code, p1, p2, p3)
+        req_code = ReqCode.stop_test
+        logger.debug("Sending request %s", (req_code, 0, 0, 0))
+        self._send_constant_request(req_code)
      
     def continue_test(self) -> None:
         # The EB software display an incoherent behavior with this function:
@@ -593,7 +733,7 @@ class Zketech(Serial):
                      cutoff_voltage: float,
                      max_duration: int=0) -> None:
         """Request the device to start a discharge test at constant current."""
-#        if not self.device_state == DeviceState["monitoring"]:
+#        if not self.device_state == DeviceState.monitoring:
 #            logger.warning(f"A startup of a test was requested while device in wrong state ({self.device_state})")
 #            return
         if current < 0:
@@ -605,11 +745,11 @@ class Zketech(Serial):
         if max_duration > 999:
             raise ZketechParametersError("Max Duration shall be inferior to 999")
         # #TBDone: checking bad parameters for superior boundaries
-        req_code = ReqCode["start_d_cc"]
+        req_code = ReqCode.start_d_cc
         p1 = int(current*1000)
         p2 = int(cutoff_voltage*100)
         p3 = int(max_duration)
-        logger.debug(f"Sending request {(req_code, p1, p2, p3)}")
+        logger.debug("Sending request %s", (req_code, p1, p2, p3))
         self.send_request(req_code, p1, p2, p3)
 
     def discharge_cp(self,
@@ -617,7 +757,7 @@ class Zketech(Serial):
                      cutoff_voltage: float,
                      max_duration: int=0) -> None:
         """Request the device to start a discharge test at constant power."""
-#        if not self.device_state == DeviceState["monitoring"]:
+#        if not self.device_state == DeviceState.monitoring:
 #            logger.warning(f"A startup of a test was requested while device in wrong state ({self.device_state})")
 #            return
         if power < 0:
@@ -629,11 +769,11 @@ class Zketech(Serial):
         if max_duration > 999:
             raise ZketechParametersError("Max Duration shall be inferior to 999")
         # #TBDone: checking bad parameters for superior boundaries
-        req_code = ReqCode["start_d_cp"]
+        req_code = ReqCode.start_d_cp
         p1 = int(power*10)
         p2 = int(cutoff_voltage*100)
         p3 = int(max_duration)
-        logger.debug(f"Sending request {(req_code, p1, p2, p3)}")
+        logger.debug("Sending request %s", (req_code, p1, p2, p3))
         self.send_request(req_code, p1, p2, p3)
 
     def _current_charge_generic(self,
@@ -641,7 +781,7 @@ class Zketech(Serial):
                         current: float,
                         nb_cells: int,
                         max_duration: int) -> None:
-#        if not self.device_state == DeviceState["monitoring"]:
+#        if not self.device_state == DeviceState.monitoring:
 #            logger.warning(f"A startup of a test was requested while device in wrong state ({self.device_state})")
 #            return
         if current < 0:
@@ -657,55 +797,65 @@ class Zketech(Serial):
         p1 = int(current*1000)
         p2 = int(nb_cells)
         p3 = int(max_duration)
-        logger.debug(f"Sending request {(req_code, p1, p2, p3)}")
+        logger.debug("Sending request %s", (req_code, p1, p2, p3))
         self.send_request(req_code, p1, p2, p3)
     
+    def charge(self,
+               battery_type: str,
+               current: float,
+               nb_cells: int,
+               max_duration: int) -> None:
+        """Request the device to start a charge at constant current.
+        
+        Battery type is 'nimh', 'nicd', 'liion', 'life' or 'vrla'.
+        
+        """
+        req_code = _CURRENT_CHARGE_CODES.get(battery_type)
+        if req_code is None:
+            raise ZketechParametersError(f"Battery type shall be one of {tuple(_CURRENT_CHARGE_CODES)}")
+        self._current_charge_generic(req_code, current, nb_cells, max_duration)
+    
     def charge_nimh(self,
                     current: float,
                     nb_cells: int,
                     max_duration: int) -> None:
         """Request the device to start a charge of a NiMh type battery."""
-        req_code = ReqCode["start_c_nimh"]
-        self._current_charge_generic(req_code, current, nb_cells, max_duration)
+        self.charge("nimh", current, nb_cells, max_duration)
      
     def charge_nicd(self,
                     current: float,
                     nb_cells: int,
                     max_duration: int) -> None:
         """Request the device to start a charge of a NiCd type battery."""
-        req_code = ReqCode["start_c_nicd"]
-        self._current_charge_generic(req_code, current, nb_cells, max_duration)
+        self.charge("nicd", current, nb_cells, max_duration)
      
     def charge_liion(self,
                     current: float,
                     nb_cells: int,
                     max_duration: int) -> None:
         """Request the device to start a charge of a lithium-ion type battery."""
-        req_code = ReqCode["start_c_liion"]
-        self._current_charge_generic(req_code, current, nb_cells, max_duration)
+        self.charge("liion", current, nb_cells, max_duration)
      
     def charge_life(self,
                     current: float,
                     nb_cells: int,
                     max_duration: int) -> None:
         """Request the device to start a charge of a LiFe type battery."""
-        req_code = ReqCode["start_c_life"]
-        self._current_charge_generic(req_code, current, nb_cells, max_duration)
+        self.charge("life", current, nb_cells, max_duration)
      
     def charge_vrla(self,
                     current: float,
                     nb_cells: int,
                     max_duration: int) -> None:
         """Request the device to start a charge of a lead-acid type battery."""
-        req_code = ReqCode["start_c_vrla"]
-        self._current_charge_generic(req_code, current, nb_cells, max_duration)
+        self.charge("vrla", current, nb_cells, max_duration)
 
     def _voltage_charge_generic(self,
                         req_code: ReqCode,
                         voltage: float,
                         cutoff_current: float,
                         max_duration: int) -> None:
-#        if not self.device_state == DeviceState["monitoring"]:
+#        if not self.device_state == DeviceState.monitoring:
 #            logger.warning(f"A startup of a test was requested while device in wrong state ({self.device_state})")
 #            return
         if voltage < 0:
@@ -721,7 +871,7 @@ class Zketech(Serial):
         p1 = int(cutoff_current*100)
         p2 = int(voltage*1000)
         p3 = int(max_duration)
-        logger.debug(f"Sending request {(req_code, p1, p2, p3)}")
+        logger.debug("Sending request %s", (req_code, p1, p2, p3))
         self.send_request(req_code, p1, p2, p3)
      
     def charge_cv(self,
@@ -729,7 +879,7 @@ class Zketech(Serial):
                     cutoff_current: float,
                     max_duration: int) -> None:
         """Request the device to start a charge at constant voltage."""
-        req_code = ReqCode["start_c_cv"]
+        req_code = ReqCode.start_c_cv
         self._voltage_charge_generic(req_code, voltage, cutoff_current, max_duration)
      
     def measure_resistance(self,
@@ -739,18 +889,18 @@ class Zketech(Serial):
         Current is in mA.
         
         """
-#        if not self.device_state == DeviceState["monitoring"]:
+#        if not self.device_state == DeviceState.monitoring:
 #            logger.warning(f"A performing of a resistance measurement was requested while device in wrong state ({self.device_state})")
 #            return
         if current < 0:
             raise ZketechParametersError("Current shall be positive")
         if current > 30000:  # Is it only for EBC-A05+ or is it standard?
             raise ZketechParametersError("Current shall be inferior to 3 A")
-        req_code = ReqCode["mes_resistance"]
+        req_code = ReqCode.mes_resistance
         p1 = int(current)
         p2 = 0
         p3 = 0
-        logger.debug(f"Sending request {(req_code, p1, p2, p3)}")
+        logger.debug("Sending request %s", (req_code, p1, p2, p3))
         self.send_request(req_code, p1, p2, p3)
         self.reset_input_buffer()
         res = self.read_response()
@@ -767,24 +917,24 @@ class Zketech(Serial):
         Voltage is in Volts. Level is 'lower' or 'upper'.
         
         """
-#        if not self.device_state == DeviceState["monitoring"]:
+#        if not self.device_state == DeviceState.monitoring:
 #            logger.warning(f"A performing of a voltage calibration was requested while device in wrong state ({self.device_state})")
 #            return
         if voltage < 0:
             raise ZketechParametersError("Voltage shall be positive")
         if not level in ("lower", "upper"):
             raise ZketechParametersError("Level shall be 'lower' or 'upper'")
-        req_code = ReqCode["calibrate"]
+        req_code = ReqCode.calibrate
         ### Fix for weird Zketech coding: for calibration, they add one field and shift p1
-        p1 = int(voltage * 1000) // 240
-        p2 = int(voltage * 1000) % 240 * 240
+        p1, p2 = divmod(int(voltage * 1000), 240)
+        p2 *= 240
         p3 = 0
         if level == "lower":
             p1 += 240 * 0
         if level == "upper":
             p1 += 240 * 1
         ###
-        logger.debug(f"Sending request {(req_code, p1, p2, p3)}")
+        logger.debug("Sending request %s", (req_code, p1, p2, p3))
         self.send_request(req_code, p1, p2, p3)
         self.reset_input_buffer()
 
@@ -796,8 +946,8 @@ class Zketech(Serial):
         Current is in Amp. Level is 'lower' or 'upper'.
         
         """
-#        if (not self.device_state == DeviceState["testing"]) or \
-#           (not self.prog_state == ProgState["d_cc"]):
+#        if (not self.device_state == DeviceState.testing) or \
+#           (not self.prog_state == ProgState.d_cc):
 #            logger.warning(f"A performing of a current calibration was requested while device in wrong state ({self.device_state}, {self.prog_state})")
 #            return
         if current < 0:
@@ -805,14 +955,14 @@ class Zketech(Serial):
         if not level in ("lower", "upper"):
             raise ZketechParametersError("Level shall be 'lower' or 'upper'")
         ### Fix for weird Zketech coding: for calibration, they add one field and shift p1
-        req_code = ReqCode["calibrate"]
-        p1 = int(current * 1000) // 240
-        p2 = int(current * 1000) % 240 * 240
+        req_code = ReqCode.calibrate
+        p1, p2 = divmod(int(current * 1000), 240)
+        p2 *= 240
         p3 = 0
         if level == "lower":
             p1 += 240 * 2
         if level == "upper":
             p1 += 240 * 3
-        logger.debug(f"Sending request {(req_code, p1, p2, p3)}")
+        logger.debug("Sending request %s", (req_code, p1, p2, p3))
         self.send_request(req_code, p1, p2, p3)
         self.reset_input_buffer()